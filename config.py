@@ -14,20 +14,25 @@ CTRADER_CONFIG = {
 }
 
 # Trading Symbols Configuration
-FOREX_MAJORS = [
-    'EURUSD', 'GBPUSD', 'USDCHF', 'AUDUSD', 
+# Tuples: immutable, hashable (usable as cache keys) and safe to share
+FOREX_MAJORS = (
+    'EURUSD', 'GBPUSD', 'USDCHF', 'AUDUSD',
     'USDCAD', 'NZDUSD', 'USDJPY'
-]
+)
 
-FOREX_CROSSES = [
-    'EURGBP', 'EURCHF', 'EURJPY', 'GBPCHF', 
+FOREX_CROSSES = (
+    'EURGBP', 'EURCHF', 'EURJPY', 'GBPCHF',
     'GBPJPY', 'CHFJPY', 'AUDCAD', 'AUDCHF'
-]
+)
 
-EXOTIC_PAIRS = [
+EXOTIC_PAIRS = (
     'USDTRY', 'USDZAR', 'USDMXN', 'EURTRY',
     'GBPTRY', 'USDSEK', 'USDNOK', 'USDDKK'
-]
+)
+
+# Full universe and O(1) symbol -> column-index lookup
+ALL_SYMBOLS = FOREX_MAJORS + FOREX_CROSSES + EXOTIC_PAIRS
+SYMBOL_INDEX = {symbol: i for i, symbol in enumerate(ALL_SYMBOLS)}
 
 # Analysis Parameters
 ANALYSIS_CONFIG = {
@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""
+Numba-accelerated kernels for the statistical arbitrage pair scan.
+
+The pairwise hedge-ratio and residual construction is a hot loop over
+C(k,2) pairs of full-length price columns. These kernels move that loop
+out of the interpreter: the outer pair index runs under numba prange so
+residual matrices for all pairs are filled in parallel, vectorized C.
+
+Numba is optional — when it is not installed the same routines run as
+broadcast NumPy, just without the parallel JIT.
+"""
+
+import numpy as np
+
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+
+def pair_indices(k):
+    """
+    Column indices (i, j) for every upper-triangular pair of k symbols.
+
+    Returns two int64 arrays of length k*(k-1)//2, in the same order as
+    itertools.combinations(range(k), 2).
+    """
+    n_pairs = k * (k - 1) // 2
+    ii = np.empty(n_pairs, dtype=np.int64)
+    jj = np.empty(n_pairs, dtype=np.int64)
+    p = 0
+    for i in range(k - 1):
+        for j in range(i + 1, k):
+            ii[p] = i
+            jj[p] = j
+            p += 1
+    return ii, jj
+
+
+def _hedge_and_residuals_numpy(X, sx, sxx, Sxy, ii, jj, out_beta, out_alpha, out_resid):
+    """Broadcast NumPy implementation used when numba is unavailable."""
+    n = X.shape[0]
+    denom = n * sxx[jj] - sx[jj] * sx[jj]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        out_beta[:] = np.where(denom != 0.0,
+                               (n * Sxy[ii, jj] - sx[ii] * sx[jj]) / denom,
+                               np.nan)
+    out_alpha[:] = (sx[ii] - out_beta * sx[jj]) / n
+    out_resid[:] = X[:, ii].T - out_alpha[:, None] - out_beta[:, None] * X[:, jj].T
+
+
+if NUMBA_AVAILABLE:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _hedge_and_residuals_jit(X, sx, sxx, Sxy, ii, jj, out_beta, out_alpha, out_resid):
+        n = X.shape[0]
+        n_pairs = ii.shape[0]
+
+        for p in prange(n_pairs):
+            i = ii[p]
+            j = jj[p]
+
+            denom = n * sxx[j] - sx[j] * sx[j]
+            if denom == 0.0:
+                out_beta[p] = np.nan
+                out_alpha[p] = np.nan
+                for t in range(n):
+                    out_resid[p, t] = np.nan
+                continue
+
+            beta = (n * Sxy[i, j] - sx[i] * sx[j]) / denom
+            alpha = (sx[i] - beta * sx[j]) / n
+            out_beta[p] = beta
+            out_alpha[p] = alpha
+            for t in range(n):
+                out_resid[p, t] = X[t, i] - alpha - beta * X[t, j]
+
+
+def hedge_and_residuals(X, sx, sxx, Sxy, ii, jj, out_beta, out_alpha, out_resid):
+    """
+    Fill hedge ratios, intercepts and residual series for all pairs.
+
+    Args:
+        X: (n, k) price matrix, float64
+        sx: per-column sums
+        sxx: per-column squared sums
+        Sxy: k x k cross-product matrix X^T X
+        ii, jj: pair index arrays from pair_indices(k)
+        out_beta, out_alpha: preallocated (n_pairs,) outputs
+        out_resid: preallocated (n_pairs, n) residual output
+
+    Pairs whose x column is constant get NaN outputs.
+    """
+    if NUMBA_AVAILABLE:
+        _hedge_and_residuals_jit(X, sx, sxx, Sxy, ii, jj,
+                                 out_beta, out_alpha, out_resid)
+    else:
+        _hedge_and_residuals_numpy(X, sx, sxx, Sxy, ii, jj,
+                                   out_beta, out_alpha, out_resid)
+
+
+def _mean_reversion_impl(returns, vol):
+    """
+    In-place mean-reversion + autocorrelation pass over a returns array.
+
+    Same recurrence as the original per-bar Python loop in
+    _generate_mock_data, but the 5-bar rolling mean is maintained as a
+    running sum so each iteration is O(1), and the whole loop JIT-compiles
+    under numba (the recurrence is sequential, so it cannot be expressed
+    as a simple vector op).
+    """
+    n = returns.shape[0]
+    rolling_sum = 0.0
+    for i in range(1, n):
+        # Mean reversion component - stronger for larger moves
+        if abs(returns[i - 1]) > 2 * vol:
+            returns[i] += -0.3 * returns[i - 1]
+
+        # Add some autocorrelation for realistic price action
+        if i == 6:
+            rolling_sum = returns[1] + returns[2] + returns[3] + returns[4] + returns[5]
+        elif i > 6:
+            rolling_sum += returns[i - 1] - returns[i - 6]
+        if i > 5:
+            returns[i] += 0.05 * (rolling_sum / 5.0)
+    return returns
+
+
+if NUMBA_AVAILABLE:
+    apply_mean_reversion = njit(cache=True)(_mean_reversion_impl)
+else:
+    apply_mean_reversion = _mean_reversion_impl
+
+
+def _returns_to_prices_impl(returns, base_price, vol):
+    """
+    Fused returns -> bounded price series, one pass over the array.
+
+    Equivalent to clip(returns, ±5*vol) -> cumsum -> exp -> scale by
+    base_price -> clamp into [0.5, 2.0]*base_price, but walks the array
+    once with a running sum instead of materializing a temporary per
+    step (the separate vector ops are memory-bound, not compute-bound).
+    """
+    n = returns.shape[0]
+    prices = np.empty(n)
+    lo = base_price * 0.5
+    hi = base_price * 2.0
+    rmax = 5.0 * vol
+    running = 0.0
+    for i in range(n):
+        r = returns[i]
+        if r > rmax:
+            r = rmax
+        elif r < -rmax:
+            r = -rmax
+        running += r
+        p = base_price * np.exp(running)
+        if p < lo:
+            p = lo
+        elif p > hi:
+            p = hi
+        prices[i] = p
+    return prices
+
+
+if NUMBA_AVAILABLE:
+    returns_to_prices = njit(cache=True)(_returns_to_prices_impl)
+else:
+    def returns_to_prices(returns, base_price, vol):
+        # Vectorized fallback: same five logical steps, NumPy temporaries
+        returns = np.clip(returns, -5 * vol, 5 * vol)
+        prices = base_price * np.exp(np.cumsum(returns))
+        np.clip(prices, base_price * 0.5, base_price * 2.0, out=prices)
+        return prices
+
+
+def make_pairscan(k):
+    """
+    Build a hedge/residual kernel specialized for a fixed symbol count.
+
+    The pair index arrays for k symbols are baked into the returned
+    function's closure, so numba compiles a dedicated variant per k with
+    the pair layout fixed at compile time (the example analyses only ever
+    scan a handful of shapes). Compilation is lazy — the dict below costs
+    nothing at import.
+    """
+    ii, jj = pair_indices(k)
+
+    if NUMBA_AVAILABLE:
+        @njit(parallel=True, fastmath=True)
+        def _scan(X, sx, sxx, Sxy, out_beta, out_alpha, out_resid):
+            n = X.shape[0]
+            n_pairs = ii.shape[0]
+            for p in prange(n_pairs):
+                i = ii[p]
+                j = jj[p]
+                denom = n * sxx[j] - sx[j] * sx[j]
+                if denom == 0.0:
+                    out_beta[p] = np.nan
+                    out_alpha[p] = np.nan
+                    for t in range(n):
+                        out_resid[p, t] = np.nan
+                    continue
+                beta = (n * Sxy[i, j] - sx[i] * sx[j]) / denom
+                alpha = (sx[i] - beta * sx[j]) / n
+                out_beta[p] = beta
+                out_alpha[p] = alpha
+                for t in range(n):
+                    out_resid[p, t] = X[t, i] - alpha - beta * X[t, j]
+    else:
+        def _scan(X, sx, sxx, Sxy, out_beta, out_alpha, out_resid):
+            _hedge_and_residuals_numpy(X, sx, sxx, Sxy, ii, jj,
+                                       out_beta, out_alpha, out_resid)
+
+    return _scan
+
+
+# The example analyses use three fixed symbol-set sizes: the 6-symbol
+# EUR-centric list, the 7 forex majors, and majors + 4 crosses (11)
+SPECIALIZED_KS = (6, 7, 11)
+_KERNELS = {k: make_pairscan(k) for k in SPECIALIZED_KS}
+
+
+def specialized_pairscan(k):
+    """Return the shape-specialized kernel for k symbols, or None."""
+    return _KERNELS.get(k)
+
+
+def batched_adf(resid, n_lags=1, regression='c', N=1):
+    """
+    ADF t-statistics, p-values and critical values for a stack of
+    residual series, computed with one batched linear solve.
+
+    The per-pair ADF regression has identical structure across pairs —
+    only the residual vector changes — so instead of P separate
+    statsmodels calls this stacks every pair's lagged design matrix into
+    a (P, m, ncols) tensor and solves all the normal equations with
+    einsum + np.linalg.solve in one shot. The regression is the standard
+    Dickey-Fuller form with a fixed number of lagged differences:
+
+        d e_t = [c +] gamma * e_{t-1} + sum_l phi_l * d e_{t-l} + u_t
+
+    P-values and critical values come from the same MacKinnon surfaces
+    statsmodels uses. Unlike adfuller's autolag='AIC' default, the lag
+    order is fixed so the whole batch shares one design shape.
+
+    For residuals of a fitted hedge regression (the Engle-Granger second
+    stage) the regression already demeans, so the design must drop the
+    constant (regression='n') and the p-value/critical-value surfaces
+    must account for the estimated cointegrating vector (N=2) — this is
+    what coint()/_test_one_pair use. The defaults reproduce a plain
+    unit-root test on an observed series.
+
+    Args:
+        resid: (P, T) residual matrix, one row per pair
+        n_lags: number of lagged difference terms
+        regression: 'c' to include a constant in the design, 'n' to omit it
+        N: number of series for the MacKinnon surfaces (1 for a plain
+            unit-root test, 2 for Engle-Granger residuals of a pair)
+
+    Returns:
+        (tstat, pvalue, crit) — arrays of shape (P,), (P,) and (P, 3)
+    """
+    from statsmodels.tsa.adfvalues import mackinnonp, mackinnoncrit
+
+    resid = np.asarray(resid, dtype=np.float64)
+    P, T = resid.shape
+    d = np.diff(resid, axis=1)
+    m = T - 1 - n_lags  # usable observations per pair
+
+    # Design: [e_{t-1}, d e_{t-1}, ..., d e_{t-n_lags}(, 1)]
+    ncols = n_lags + 1 + (1 if regression == 'c' else 0)
+    A = np.empty((P, m, ncols))
+    A[:, :, 0] = resid[:, n_lags:-1]
+    for lag in range(1, n_lags + 1):
+        A[:, :, lag] = d[:, n_lags - lag:T - 1 - lag]
+    if regression == 'c':
+        A[:, :, -1] = 1.0
+    y = d[:, n_lags:]
+
+    AtA = np.einsum('ptk,ptl->pkl', A, A)
+    Aty = np.einsum('ptk,pt->pk', A, y)
+    coef = np.linalg.solve(AtA, Aty[..., None])[..., 0]
+
+    fitted = np.einsum('ptk,pk->pt', A, coef)
+    rss = ((y - fitted) ** 2).sum(axis=1)
+    sigma2 = rss / (m - ncols)
+    AtA_inv = np.linalg.inv(AtA)
+    se = np.sqrt(sigma2 * AtA_inv[:, 0, 0])
+
+    tstat = coef[:, 0] / se
+    # The surface trend is always 'c' here: for N=2 the constant lives in
+    # the first-stage hedge regression, not in this ADF design.
+    pvalue = np.array([mackinnonp(t, regression='c', N=N) for t in tstat])
+    nobs = m - ncols
+    crit = np.tile(mackinnoncrit(N=N, regression='c', nobs=nobs), (P, 1))
+    return tstat, pvalue, crit
+
+
+_warmed_up = False
+
+def warmup():
+    """
+    Trigger JIT compilation on a tiny input so the first real call
+    doesn't pay the compile cost. No-op without numba.
+    """
+    global _warmed_up
+    if _warmed_up or not NUMBA_AVAILABLE:
+        _warmed_up = True
+        return
+
+    X = np.random.default_rng(0).standard_normal((8, 3))
+    ii, jj = pair_indices(3)
+    beta = np.empty(3)
+    alpha = np.empty(3)
+    resid = np.empty((3, 8))
+    hedge_and_residuals(X, X.sum(0), (X * X).sum(0), X.T @ X,
+                        ii, jj, beta, alpha, resid)
+    _warmed_up = True